@@ -7,13 +7,28 @@ Controller class
 """
 
 # std libraries
+import os
+import sys
+import logging
 import time
 import json
+import hashlib
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Event, Lock, Condition
 import yaml
 
 # external libraries
 import udi_interface
 
+# optional, faster parsing of the JSON device definitions
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # personal libraries
 from nodes import VirtualSwitch
 from nodes import VirtualTemp
@@ -47,6 +62,144 @@ GETLIST = [' ',
            '/1/'
           ]
 
+# device type, as used in the configuration, to the node class created
+DEVICE_TYPE_TO_NODE_CLASS = {
+    'switch': VirtualSwitch,
+    'temperature': VirtualTemp,
+    'temperaturec': VirtualTempC,
+    'temperaturecr': VirtualTempC,
+    'generic': VirtualGeneric,
+    'dimmer': VirtualGeneric,
+    'garage': VirtualGarage,
+}
+
+# nodeDefIds of the device nodes, as stored in the Polyglot db
+VALID_NODE_CLASS_NAMES = frozenset(cls.__name__.lower() for cls in DEVICE_TYPE_TO_NODE_CLASS.values())
+
+# device types which can be configured as a bare '<id>: <type>' param
+SIMPLE_DEVICE_TYPES = frozenset({'switch', 'temperature', 'temperaturec', 'temperaturecr', 'generic', 'dimmer'})
+
+# param keys accepted for the yaml device file
+DEVFILE_KEYS = frozenset({'devFile', 'devfile'})
+
+# first characters of a device id param key
+DIGITS = frozenset('0123456789')
+
+# libyaml backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# default concurrent getDataFromID calls during longPoll, the pollWorkers
+# param raises it; each worker waits pullDelay after its pull, so the
+# default of 1 keeps the pulls serial, spaced by pullDelay
+POLL_WORKERS = 1
+
+# concurrent reportDrivers calls during query, a pool of its own so a
+# query never waits behind the longPoll pulls
+QUERY_WORKERS = 4
+
+PROFILE_DIR = 'profile'
+
+# seconds start() waits for the custom data handlers; they deliver the
+# params, so this one can not come from the params
+HANDLERS_TIMEOUT = 60
+
+def load_devices(stream):
+    """
+    Compose the devFile and construct only the items of its top level
+    'devices' section, one device at a time; other sections are never
+    turned into python objects. None if there is no devices section.
+    A devFile written as JSON is read with the much faster JSON parser.
+    """
+    if isinstance(stream, bytes) and stream.lstrip()[:1] == b'{':
+        try:
+            doc = json_loads(stream)
+        except ValueError:
+            pass  # not plain JSON after all, let YAML have it
+        else:
+            return doc.get('devices') if isinstance(doc, dict) else None
+    loader = YAML_LOADER(stream)
+    try:
+        root = loader.get_single_node()
+        if not isinstance(root, yaml.MappingNode):
+            return None
+        for key_node, value_node in root.value:
+            if key_node.value != 'devices':
+                continue
+            if isinstance(value_node, yaml.SequenceNode):
+                return [loader.construct_object(item, deep=True) for item in value_node.value]
+            return loader.construct_object(value_node, deep=True)
+        return None
+    finally:
+        loader.dispose()
+
+# parsed devFile devices with a digest of the file content, one cache file
+# per devFile path, so an unchanged devFile is not parsed again after a restart
+DEVICES_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'udi-virtual')
+
+def devices_cache_path(filename):
+    """
+    Cache file of a devFile, other plugin instances and devFiles have their own.
+    """
+    path_digest = hashlib.blake2b(os.path.abspath(filename).encode(), digest_size=8).hexdigest()
+    return os.path.join(DEVICES_CACHE_DIR, f'devlist-{path_digest}.pkl')
+
+def read_devices_cache(filename, digest):
+    """
+    The cached devices of the devFile if they were parsed from content with
+    this digest. Only a file we own and no one else can write is unpickled.
+    """
+    try:
+        with open(devices_cache_path(filename), 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                LOGGER.warning('read_devices_cache: ignoring %s, not private to this user', f.name)
+                return None
+            cached_digest, devices = pickle.load(f)
+    except Exception:
+        return None
+    return devices if cached_digest == digest else None
+
+def write_devices_cache(filename, digest, devices):
+    """
+    Atomically replace the devFile's cached devices, a failure only costs a
+    re-parse on the next start.
+    """
+    tmp_name = None
+    try:
+        os.makedirs(DEVICES_CACHE_DIR, mode=0o700, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=DEVICES_CACHE_DIR, delete=False) as f:
+            tmp_name = f.name
+            pickle.dump((digest, devices), f)
+        os.replace(tmp_name, devices_cache_path(filename))
+        tmp_name = None
+    except Exception as ex:
+        LOGGER.debug('write_devices_cache: %s', ex)
+        # a failed write must not leave the temp file behind
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+def profile_digest(path = PROFILE_DIR):
+    """
+    SHA-256 over the profile files (relative names and content), used to
+    skip the profile upload when nothing has changed.
+    """
+    digest = hashlib.sha256()
+    dirs = [path]
+    while dirs:
+        with os.scandir(dirs.pop()) as it:
+            entries = sorted(it, key=lambda e: e.path)
+        for entry in entries:
+            if entry.is_dir():
+                dirs.append(entry.path)
+            elif entry.is_file():
+                digest.update(os.path.relpath(entry.path, path).encode())
+                with open(entry.path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
 class Controller(udi_interface.Node):
     id = 'controller'
 
@@ -56,8 +209,7 @@ class Controller(udi_interface.Node):
         self definitions
         data storage classes
         subscribes
-        ready
-        we exist!
+        register() then adds the node and calls ready
         """
         super().__init__(polyglot, primary, address, name)
 
@@ -68,19 +220,45 @@ class Controller(udi_interface.Node):
         self.parseDelay = 0.1
         self.pullError = False
         self.pullDelay = 0.1
-
-
-        self.n_queue = []
+        self.nodeAddTimeout = 60.0
+        self.pruneDbNodes = False  # opt-in, see _cleanup_nodes
+        self.pollWorkers = POLL_WORKERS
+        self._pool = ThreadPoolExecutor(max_workers=POLL_WORKERS)
+        self._pool_workers = POLL_WORKERS
+        self._pulls = []
+        # not shut down by stop(), a QUERY may still arrive after it
+        self._query_pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS)
+
+        self.n_queue = set()  # addresses reported by ADDNODEDONE
+        self.queue_condition = Condition()
         self.last = 0.0
+        self.hb = 0  # last heartbeat sent, 0 -> DON is next
         self.no_update = False
-        self.discovery = False
-        self.valid_configuration = False
-        self.parmDone = False
+        self.discovery = False  # pauses polling while discovery runs
+        self._discovery_lock = Lock()
+        self.config_valid_event = Event()
+        self.parm_done_event = Event()
+        self.profile_event = Event()  # set once start() has checked the profile
+        self.ready_event = Event()  # set once start() has completed, cleared by stop()
+        self._params_key = None  # last params loaded and discovered
+        self._devfile_cache = None
+        self.devlist = []
+        self.devices = []
+        self._discovered_devices = None  # devices of the last discovery
+        # default node names repeat on every discovery
+        self._valid_name = lru_cache(maxsize=512)(polyglot.getValidName)
+
+        # start() waits until each custom data handler has run once;
+        # the event is set when none are left pending
+        self._pending_handlers = {'params', 'data', 'typedparams', 'typeddata'}
+        self._handlers_lock = Lock()
+        self.all_handlers_st_event = Event()
 
         # Create data storage classes to hold specific data that we need
         # to interact with.  
         self.Parameters = Custom(polyglot, 'customparams')
         self.Notices = Custom(polyglot, 'notices')
+        self.Data = Custom(polyglot, 'customdata')
         self.TypedParameters = Custom(polyglot, 'customtypedparams')
         self.TypedData = Custom(polyglot, 'customtypeddata')
 
@@ -92,6 +270,7 @@ class Controller(udi_interface.Node):
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.LOGLEVEL, self.handleLevelChange)
         self.poly.subscribe(self.poly.CUSTOMPARAMS, self.parameterHandler)
+        self.poly.subscribe(self.poly.CUSTOMDATA, self.dataHandler)
         self.poly.subscribe(self.poly.CUSTOMTYPEDPARAMS, self.typedParameterHandler)
         self.poly.subscribe(self.poly.CUSTOMTYPEDDATA, self.typedDataHandler)
         self.poly.subscribe(self.poly.POLL, self.poll)
@@ -99,36 +278,40 @@ class Controller(udi_interface.Node):
         self.poly.subscribe(self.poly.DISCOVER, self.discover)
         self.poly.subscribe(self.poly.ADDNODEDONE, self.node_queue)
 
+    def register(self):
+        # Tell the interface we exist, called by the entry point once the
+        # Controller has been constructed. The controller node is added
+        # before ready(), so it exists before CUSTOMPARAMS can start a
+        # discovery and the device nodes look up their parent.
+        self.poly.addNode(self)
+
         # Tell the interface we have subscribed to all the events we need.
         # Once we call ready(), the interface will start publishing data.
         self.poly.ready()
 
-        # Tell the interface we exist.  
-        self.poly.addNode(self)
-
-        '''
-        node_queue() and wait_for_node_event() create a simple way to wait
-        for a node to be created.  The nodeAdd() API call is asynchronous and
-        will return before the node is fully created. Using this, we can wait
-        until it is fully created before we try to use it.
-        '''
+    '''
+    node_queue() and wait_for_nodes_done() create a simple way to wait
+    for nodes to be created.  The nodeAdd() API call is asynchronous and
+    will return before the node is fully created. Using this, we can wait
+    until they are fully created before we try to use them.
+    '''
     def node_queue(self, data):
-        self.n_queue.append(data['address'])
-
-    def wait_for_node_done(self):
-        while len(self.n_queue) == 0:
-            time.sleep(0.1)
-        self.n_queue.pop()
+        with self.queue_condition:
+            self.n_queue.add(data['address'])
+            self.queue_condition.notify_all()
+
+    def wait_for_nodes_done(self, addresses):
+        pending = set(addresses)
+        with self.queue_condition:
+            if not self.queue_condition.wait_for(lambda: pending <= self.n_queue,
+                                                 timeout=self.nodeAddTimeout):
+                LOGGER.error('Timed out waiting for nodes to be added: %s', pending - self.n_queue)
+            self.n_queue -= pending
 
     def start(self):
         self.Notices['hello'] = 'Start-up'
 
         self.last = 0.0
-        # Send the profile files to the ISY if neccessary. The profile version
-        # number will be checked and compared. If it has changed since the last
-        # start, the new files will be sent.
-        self.poly.updateProfile()
-
         # Send the default custom parameters documentation file to Polyglot
         # for display in the dashboard.
         self.poly.setCustomParamsDoc()
@@ -138,19 +321,74 @@ class Controller(udi_interface.Node):
         # heartbeat in your node server
         self.heartbeat(True)
 
-        while self.valid_configuration is False:
+        # wait for the params, data, typedparams & typeddata handlers
+        if not self.all_handlers_st_event.wait(timeout=HANDLERS_TIMEOUT):
+            LOGGER.error('Start: Timed out waiting for handlers to complete')
+
+        # Send the profile files to the ISY if neccessary. A hash of the
+        # profile directory is kept in customdata, the files are only sent
+        # when it has changed since the last upload, or forceProfile is set.
+        # Discovery waits for this, new nodes need their nodedefs.
+        self.checkProfile()
+        self.profile_event.set()
+
+        # only post the waiting notice once, each Notices change is a
+        # round-trip to Polyglot
+        waiting = False
+        if not self.config_valid_event.is_set():
             LOGGER.info('Start: Waiting on valid configuration')
             self.Notices['waiting'] = 'Waiting on valid configuration'
-            time.sleep(5)
-        self.Notices.delete('waiting')
+            waiting = True
+            self.config_valid_event.wait()
 
-        while not self.parmDone:
-            LOGGER.info("Start: Waiting on first Discovery Completion")
-            time.sleep(1)
+        LOGGER.info("Start: Waiting on first Discovery Completion")
+        self.parm_done_event.wait()
 
         LOGGER.info('Started Virtual Device NodeServer v%s', self.poly.serverdata)
         self.query()
+        # clear start-up notices together at the end of start-up
+        if waiting:
+            self.Notices.delete('waiting')
         self.Notices.delete('hello')
+        self.ready_event.set()
+
+    def _mark_handler_done(self, handler):
+        """
+        Remove a handler from those start() is waiting on, later runs of
+        the same handler change nothing.
+        """
+        with self._handlers_lock:
+            if handler not in self._pending_handlers:
+                return
+            self._pending_handlers.discard(handler)
+            done = not self._pending_handlers
+        if done:
+            self.all_handlers_st_event.set()
+
+    def checkProfile(self):
+        try:
+            digest = profile_digest()
+        except OSError as ex:
+            LOGGER.error(f'checkProfile: failed to hash {PROFILE_DIR}: {ex}')
+            self.poly.updateProfile()
+            return
+        # forceProfile re-sends unchanged files, e.g. the IoX lost them
+        force = str(self.Parameters.get('forceProfile')).lower() == 'true'
+        if not force and self.Data.get('profile_sha') == digest:
+            LOGGER.info('checkProfile: profile unchanged, skipping update')
+            return
+        LOGGER.info('checkProfile: profile %s, updating', 'forced' if force else 'changed')
+        self.poly.updateProfile()
+        self.Data['profile_sha'] = digest
+
+    """
+    Called via the CUSTOMDATA event. Holds data we keep between
+    restarts, e.g. the hash of the last uploaded profile.
+    """
+    def dataHandler(self, data):
+        self.Data.load(data)
+        LOGGER.debug('Loading data now')
+        self._mark_handler_done('data')
 
     """
     Called via the CUSTOMPARAMS event. When the user enters or
@@ -167,70 +405,199 @@ class Controller(udi_interface.Node):
     parameters will result in a new event, causing an infinite loop.
     """
     def parameterHandler(self, params):
+        # nothing to re-parse or re-discover when the parameters and the
+        # devFile they name are the same as the last successfully loaded set
+        params_key = self._get_params_key(params)
+        if params_key is not None and params_key == self._params_key:
+            LOGGER.info('parmHandler: parameters unchanged, skipping')
+            self._mark_handler_done('params')
+            return
         self.Parameters.load(params)
         LOGGER.info('parmHandler: Loading parameters now')
-        if self.checkParams():
-            self.discoverNodes()
-            self.parmDone = True
+        valid = self.checkParams()
+        # config_valid_event is settled, start() can go on to the profile
+        # check. Marked done before discovery, which waits for that check
+        # so no node is added before its nodedef; start() only queries the
+        # nodes once discovery has set parm_done_event.
+        self._mark_handler_done('params')
+        if valid:
+            self.discoverNodes(wait=True)
+            self.parm_done_event.set()
+            self._params_key = params_key
         LOGGER.info('parmHandler Done...')
 
+    def _get_params_key(self, params):
+        """
+        Hash of the params and the mtime and size of the devFile they name,
+        so an edited devFile saved with the same params is still reloaded.
+        None when the devFile can not be read, checkParams reports that.
+        """
+        stats = []
+        for key in sorted(DEVFILE_KEYS):
+            filename = params.get(key)
+            if filename:
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    return None
+                stats.append((st.st_mtime_ns, st.st_size))
+        return hash((json.dumps(params, sort_keys=True, default=str), tuple(stats)))
+
+    def _handle_file_devices(self, filename):
+        """
+        Return the devices section of the devFile, re-using the last parse
+        while the file's mtime and size are unchanged, or a cached parse of
+        the same content. None on error.
+        """
+        try:
+            st = os.stat(filename)
+        except Exception as ex:
+            LOGGER.error(f"CheckParams: Failed to open {filename}: {ex}")
+            return None
+        key = (filename, st.st_mtime_ns, st.st_size)
+        if self._devfile_cache is not None and self._devfile_cache[0] == key:
+            LOGGER.info('file: %s unchanged, using cached devices', filename)
+            return self._devfile_cache[1]
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except Exception as ex:
+            LOGGER.error(f"CheckParams: Failed to open {filename}: {ex}")
+            return None
+        # same content as a previous parse, e.g. only the mtime was touched
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        devices = read_devices_cache(filename, digest)
+        if devices is None:
+            try:
+                devices = load_devices(data)  # upload devfile into data
+            except Exception as ex:
+                LOGGER.error(f"checkParams: Failed to parse {filename} content: {ex}")
+                return None
+            if not isinstance(devices, list):
+                LOGGER.error(f"checkParams: Manual discovery file {filename} is missing devices section")
+                return None
+            write_devices_cache(filename, digest, devices)
+        LOGGER.info('file: %s with devices: %s transferred into self.devlist', filename, devices)
+        self._devfile_cache = (key, devices)
+        return devices
+
+    def _handle_json_devices(self, json_params):
+        """
+        Parse the json device params, each value on its own. None on error.
+        """
+        # a json device is an object, e.g. a misspelt device type is not
+        for a, val in json_params:
+            if val.lstrip()[:1] != '{':
+                LOGGER.error(f"JSON parse exception: not a json object for  key: {a} the value: {val}")
+                return None
+
+        devices = []
+        debug = LOGGER.isEnabledFor(logging.DEBUG)  # checked once, not per device
+        for a, val in json_params:
+            try:
+                device = json_loads(val)
+                if debug:
+                    LOGGER.debug('json device before loads: %s, type: %s', device, type(device))
+                if "id" not in device:
+                    device["id"] = a
+                    if debug:
+                        LOGGER.debug('no id: inserting id: %s into device: %s', a, device)
+                if device["id"] != a:
+                    LOGGER.error(f"error id: {a} != deviceID: {device['id']} fixed device: {device}")
+                    device["id"] = a
+                devices.append(device)
+            except Exception as ex:
+                LOGGER.error(f"JSON parse exception: {ex} for  key: {a} the value: {val} created exeption: {ex}" )
+                return None
+        return devices
+
+    def _get_node_name(self, dev):
+        """
+        The configured name, else one made from the type and id.
+        """
+        if "name" in dev:
+            return dev["name"]
+        return self._valid_name(f"{dev.get('type')} {dev.get('id')}")
+
     def checkParams(self):
         params = self.Parameters
-        self.devlist = []
-        for key,val in params.items():
-            a = key
+
+        # split the device id keys from the named settings in one pass
+        device_params = []
+        other_params = []
+        for key, val in params.items():
+            if key and key[0] in DIGITS and key.isdigit():
+                device_params.append((key, val))
+            else:
+                other_params.append((key, val))
+
+        intern = sys.intern
+        simple_types = SIMPLE_DEVICE_TYPES
+        self.devlist = [{'id': a, 'type': intern(val), 'name': f"{val} {a}"}
+                        for a, val in device_params if val in simple_types]
+        # json device params are parsed below
+        json_params = [(a, val) for a, val in device_params
+                       if val is not None and val not in simple_types]
+
+        for a, val in other_params:
             if a == "parseDelay":
                 self.parseDelay = float(val)
             elif a == "pullDelay":
                 self.pullDelay = float(val)
-            elif a.isdigit():
-                if val in {'switch', 'temperature', 'temperaturec', 'temperaturecr', 'generic', 'dimmer'}:
-                    name = str(val) + ' ' + str(key)
-                    device = {'id': a, 'type': val, 'name': name}
-                    self.devlist.append(device)
-                elif val is not None:
-                    try:
-                        device = {}
-                        device = json.loads(val)
-                        LOGGER.debug(f'json device before loads: {device}, type: {type(device)}')
-                        if "id" not in device:
-                            device["id"] = a
-                            LOGGER.debug(f'no id: inserting id: {a} into device: {device}')
-                        if device["id"] != a:
-                            device["id"] = a
-                            LOGGER.error(f"error id: {a} != deviceID: {device['id']} fixed device: {device}")
-                        self.devlist.append(device)
-                    except Exception as ex:
-                        LOGGER.error(f"JSON parse exception: {ex} for  key: {a} the value: {val} created exeption: {ex}" )
-                        return False
-            elif a == "devFile" or a == "devfile":
+            elif a == "nodeAddTimeout":
+                self.nodeAddTimeout = float(val)
+            elif a == "pollWorkers":
+                self.pollWorkers = max(1, int(val))
+            elif a == "pruneDbNodes":
+                self.pruneDbNodes = str(val).lower() == 'true'
+            elif a == "forceProfile":
+                pass  # read by checkProfile
+            elif a in DEVFILE_KEYS:
                 if val is not None:
-                    try:
-                        f = open(val)
-                    except Exception as ex:
-                        LOGGER.error(f"CheckParams: Failed to open {val}: {ex}")
-                        return False
-                    try:
-                        dev_yaml = yaml.safe_load(f.read())  # upload devfile into data
-                        f.close()
-                    except Exception as ex:
-                        LOGGER.error(f"checkParams: Failed to parse {val} content: {ex}")
+                    devices = self._handle_file_devices(val)
+                    if devices is None:
                         return False
-                    if "devices" not in dev_yaml:
-                        LOGGER.error(f"checkParams: Manual discovery file {val} is missing devices section")
-                        return False
-                    self.devlist.extend(dev_yaml["devices"])  # transfer devfile into devlist
-                    LOGGER.info(f'file: {val} with content: {dev_yaml} transferred into self.devlist')
+                    self.devlist.extend(devices)  # transfer devfile into devlist
                 else:
                     LOGGER.error('checkParams: devFile missing filename')
                     return False
             else:
                 LOGGER.error(f'unknown keyfield: {a}')
+
+        if json_params:
+            devices = self._handle_json_devices(json_params)
+            if devices is None:
+                return False
+            self.devlist.extend(devices)
                     
+        # (id, node class, name) for each valid device of a supported
+        # type, what discoverNodes uses
+        devices = []
+        for dev in self.devlist:
+            if not isinstance(dev, dict):
+                LOGGER.error("Invalid device definition: %s", dev)
+                continue
+            dev_id = dev.get("id")
+            dev_type = dev.get("type")
+            if dev_id is None or dev_type is None:
+                LOGGER.error("Invalid device definition: %s", dev)
+                continue
+            # params & json give strings, only yaml ids may need converting
+            if not isinstance(dev_id, str):
+                dev_id = str(dev_id)
+            if not isinstance(dev_type, str):
+                dev_type = str(dev_type)
+            node_class = DEVICE_TYPE_TO_NODE_CLASS.get(dev_type)
+            if node_class is None:
+                LOGGER.error(f"Device type {dev_type} is not yet supported")
+                continue
+            devices.append((dev_id, node_class, self._get_node_name(dev)))
+        self.devices = devices
+
         LOGGER.info('checkParams is complete')
-        LOGGER.info(f'checkParams: self.devlist: {self.devlist}')
+        LOGGER.info('checkParams: self.devlist: %s', self.devlist)
         LOGGER.info('Pull Delay set to %s seconds, Parse Delay set to %s seconds', self.pullDelay, self.parseDelay)
-        self.valid_configuration = True
+        self.config_valid_event.set()
         return True
 
         
@@ -248,6 +615,7 @@ class Controller(udi_interface.Node):
         self.TypedParameters.load(params)
         LOGGER.debug('Loading typed parameters now')
         LOGGER.debug(params)
+        self._mark_handler_done('typedparams')
 
     """
     Called via the CUSTOMTYPEDDATA event. This event is sent when
@@ -263,12 +631,13 @@ class Controller(udi_interface.Node):
         self.TypedData.load(params)
         LOGGER.debug('Loading typed data now')
         LOGGER.debug(params)
+        self._mark_handler_done('typeddata')
 
     """
     Called via the LOGLEVEL event.
     """
     def handleLevelChange(self, level):
-        LOGGER.info('New log level: {}'.format(level))
+        LOGGER.info('New log level: %s', level)
 
             
     """
@@ -282,18 +651,41 @@ class Controller(udi_interface.Node):
     intervals.
     """
     def poll(self, flag):
+        # nothing to pull until start() has finished, or after stop()
+        if not self.ready_event.is_set():
+            return
         # pause updates when in discovery
         if self.discovery:
             LOGGER.info('Skipping poll while in Discovery')
         else:
-            if 'longPoll' in flag:
+            if flag == 'longPoll':
                 LOGGER.debug('longPoll (controller)')
-                for node in self.poly.nodes():
-                    if node != self:
-                        node.getDataFromID()
-                    time.sleep(float(self.pullDelay))
+                # pulls are submitted without waiting so the poll thread is
+                # not held by ISY round-trips, skip if the last set is running
+                if not all(pull.done() for pull in self._pulls):
+                    LOGGER.info('Skipping longPoll, previous pulls still running')
+                    return
+                if self._pool_workers != self.pollWorkers:
+                    # pollWorkers changed, the old pool has nothing running
+                    self._pool.shutdown(wait=False)
+                    self._pool = ThreadPoolExecutor(max_workers=self.pollWorkers)
+                    self._pool_workers = self.pollWorkers
+                self._pulls = [self._pool.submit(self.pullNode, node)
+                               for node in self.poly.nodes() if node != self]
             else:
                 LOGGER.debug('shortPoll (controller)')
+
+    def pullNode(self, node):
+        """
+        Run on the poll pool, pullDelay spaces the pulls made by each
+        worker so the ISY is not flooded; with pollWorkers at 1 it is the
+        delay between pulls.
+        """
+        try:
+            node.getDataFromID()
+        except Exception as ex:
+            LOGGER.error(f'pullNode: {node.name} failed: {ex}')
+        time.sleep(float(self.pullDelay))
  
     def query(self, command = None):
         """
@@ -304,9 +696,8 @@ class Controller(udi_interface.Node):
         device represented by the node and report back the current 
         status.
         """
-        nodes = self.poly.getNodes()
-        for node in nodes:
-            nodes[node].reportDrivers()
+        # reported on the query pool, waiting until all have been sent
+        list(self._query_pool.map(lambda node: node.reportDrivers(), self.poly.getNodes().values()))
 
     def updateProfile(self,command):
         LOGGER.info('update profile')
@@ -321,92 +712,94 @@ class Controller(udi_interface.Node):
         self.checkParams()
         self.discoverNodes()
 
-    def discoverNodes(self):
-        if self.discovery:
+    def discoverNodes(self, wait = False):
+        # nodes are only added once their nodedefs have been sent
+        if not self.profile_event.is_set():
+            LOGGER.info('Discovery: waiting on the profile check')
+            self.profile_event.wait()
+        # the params handler and the DISCOVER command can both get here,
+        # the lock lets only one of them run discovery at a time. A DISCOVER
+        # command is dropped while one runs, new params wait for it so
+        # they are always applied.
+        if not self._discovery_lock.acquire(blocking=wait):
             LOGGER.info('Discover already running.')
             return
-
-        self.discovery = True
+        try:
+            self.discovery = True
+            self._discover()
+        finally:
+            self.discovery = False
+            self._discovery_lock.release()
+
+    def _discover(self):
         LOGGER.info("In Discovery...")
 
-        nodes = self.poly.getNodes()
-        LOGGER.debug(f"current nodes = {nodes}")
-        nodes_old = []
-        for node in nodes:
-            LOGGER.debug(f"current node = {node}")
-            if node != self.id:
-                nodes_old.append(node)
+        # checkParams may replace self.devices meanwhile, use one snapshot
+        devices = self.devices
+
+        # existing nodes, fetched once, keyed by address
+        existing = {addr: node for addr, node in self.poly.getNodes().items() if addr != self.id}
+        LOGGER.debug("current nodes = %s", existing)
+        nodes_old = list(existing)
+
+        # the same devices as the last discovery and all of their nodes
+        # are still here, e.g. a DISCOVER command with no config change;
+        # pruneDbNodes always checks the db
+        if (not self.pruneDbNodes and devices == self._discovered_devices
+                and existing.keys() == {id for id, _, _ in devices}):
+            LOGGER.info('Discovery: devices unchanged, nothing to do')
+            return
+
+        # our device nodes in the Polyglot db, only deleted with pruneDbNodes
+        nodes_db = [node for node in self.poly.getNodesFromDb()
+                    if node.get("nodeDefId", "").lower() in VALID_NODE_CLASS_NAMES]
+
+        # devices keyed by id, a later duplicate id wins
+        wanted = {id: (node_class, name) for id, node_class, name in devices}
 
         nodes_new = []
-        for dev in self.devlist:
-            if ("id" not in dev or "type" not in dev):
-                LOGGER.error("Invalid device definition: {json.dumps(dev)}")
-                continue
-            type = str(dev["type"])
-            id = str(dev["id"])
-            if "name" in dev:
-                name = dev["name"]
-            else:
-                name = type + ' ' + id
-            nodeExists = self.poly.getNode(id)
-            if type == "switch":
-                if not nodeExists:
-                    self.poly.addNode(VirtualSwitch(self.poly, self.address, id, name))
-                    self.wait_for_node_done()
-                else:
-                    if nodeExists.name != type + " " + id:
-                        nodeExists.rename(name)
-            elif type == 'temperature':
-                if not self.poly.getNode(id):
-                    self.poly.addNode(VirtualTemp(self.poly, self.address, id, name))
-                    self.wait_for_node_done()
-                else:
-                    if nodeExists.name != type + " " + id:
-                        nodeExists.rename(name)
-            elif type == 'temperaturec' or type == 'temperaturecr':
-                if not self.poly.getNode(id):
-                    self.poly.addNode(VirtualTempC(self.poly, self.address, id, name))
-                    self.wait_for_node_done()
-                else:
-                    if nodeExists.name != type + " " + id:
-                        nodeExists.rename(name)
-            elif type == 'generic' or type == 'dimmer':
-                if not self.poly.getNode(id):
-                    self.poly.addNode(VirtualGeneric(self.poly, self.address, id, name))
-                    self.wait_for_node_done()
-                else:
-                    if nodeExists.name != type + " " + id:
-                        nodeExists.rename(name)
-            elif type == 'garage':
-                if not self.poly.getNode(id):
-                    self.poly.addNode(VirtualGarage(self.poly, self.address, id, name))
-                    self.wait_for_node_done()
-                else:
-                    if nodeExists.name != type + " " + id:
-                        nodeExists.rename(name)
-            else:
-                LOGGER.error(f"Device type {type} is not yet supported")
-                continue
+        pending = []  # added nodes, waited on together below
+        # bound once, the loop runs for every configured device
+        get_existing = existing.get
+        add_node = self.poly.addNode
+        poly, address = self.poly, self.address
+        for id, (node_class, name) in wanted.items():
+            nodeExists = get_existing(id)
+            if not nodeExists:
+                pending.append(add_node(node_class(poly, address, id, name)).address)
+            elif nodeExists.name != name:
+                nodeExists.rename(name)
             nodes_new.append(id)
+        self.wait_for_nodes_done(pending)
+
+        stale = self._cleanup_nodes(nodes_new, nodes_old, nodes_db)
+        self._discovered_devices = devices
 
-        # remove nodes which do not exist in gateway
-        nodes = self.poly.getNodesFromDb()
-        LOGGER.info(f"db nodes = {nodes}")
-        nodes = self.poly.getNodes()
-        nodes_get = {key: nodes[key] for key in nodes if key != self.id}
-        LOGGER.info(f"old nodes = {nodes_old}")
-        LOGGER.info(f"new nodes = {nodes_new}")
-        LOGGER.info(f"pre-delete nodes = {nodes_get}")
-        for node in nodes_get:
-            if (node not in nodes_new):
-                LOGGER.info(f"need to delete node {node}")
-                self.poly.delNode(node)
-
-        self.discovery = False
-        if nodes_get == nodes_new:
-            LOGGER.error('Discovery NO NEW activity')
+        if not pending and not stale:
+            LOGGER.info('Discovery NO NEW activity')
         LOGGER.info('Discovery complete.')
 
+    def _cleanup_nodes(self, nodes_new, nodes_old, nodes_db):
+        """
+        Delete the device nodes added this session which are no longer
+        configured. Nodes only left in the Polyglot db are deleted too when
+        pruneDbNodes is set; ISY programs and scenes may still use them.
+        Returns the deleted addresses.
+        """
+        LOGGER.info("db nodes = %s", nodes_db)
+        LOGGER.info("old nodes = %s", nodes_old)
+        LOGGER.info("new nodes = %s", nodes_new)
+
+        stale = set(nodes_old)
+        if self.pruneDbNodes:
+            # a node both added this session and in the db is deleted once
+            stale.update(node["address"] for node in nodes_db)
+        stale.difference_update(nodes_new)
+        for address in stale:
+            LOGGER.info("need to delete node %s", address)
+            self.poly.delNode(address)
+        return stale
+
     def delete(self):
         """
         This is called by Polyglot upon deletion of the NodeServer. If the
@@ -421,6 +814,9 @@ class Controller(udi_interface.Node):
         the opportunity here to cleanly disconnect from your device or do
         other shutdown type tasks.
         """
+        # no more polls, and the queued pulls do not reach the ISY
+        self.ready_event.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
         LOGGER.info('NodeServer stopped.')
 
     def heartbeat(self,init=False):
@@ -430,10 +826,10 @@ class Controller(udi_interface.Node):
         the ISY.  Programs on the ISY can then monitor this and take action
         when the heartbeat fails to update.
         """
-        LOGGER.debug('heartbeat: init={}'.format(init))
+        LOGGER.debug('heartbeat: init=%s', init)
         if init is not False:
             self.hb = init
-        LOGGER.debug('heartbeat: hb={}'.format(self.hb))
+        LOGGER.debug('heartbeat: hb=%s', self.hb)
         if self.hb == 0:
             self.reportCmd("DON",2)
             self.hb = 1
@@ -442,7 +838,7 @@ class Controller(udi_interface.Node):
             self.hb = 0
 
     def removeNoticesAll(self, command = None):
-        LOGGER.info('remove_notices_all: notices={}'.format(self.Notices))
+        LOGGER.info('remove_notices_all: notices=%s', self.Notices)
         # Remove all existing notices
         self.Notices.clear()
 
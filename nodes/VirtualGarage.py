@@ -10,7 +10,6 @@ import os
 import time
 import shelve
 import os.path
-import subprocess
 import ipaddress
 from xml.dom.minidom import parseString
 
@@ -341,11 +340,10 @@ class VirtualGarage(udi_interface.Node):
         try:
             if os.path.exists(self.file):
                 LOGGER.info(f'Deleting db: {self.file}')
-                subprocess.run(["rm", self.file])
+                os.remove(self.file)
         except Exception as ex:
                 LOGGER.error(f"deleteDB error: {ex}")
         else:
-            time.sleep(1)
             success = True
         finally:
             LOGGER.info(f"deleteDB complete...success = {success}")
@@ -8,7 +8,6 @@ VirtualGeneric class
 import time
 import os.path
 import shelve
-import subprocess
 
 import udi_interface
 
@@ -59,6 +58,10 @@ class VirtualGeneric(udi_interface.Node):
 
         self.level = 0
 
+        # db file names, computed once rather than on every store
+        self.setDBnames()
+        self.key = 'key' + str(self.address)
+
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.POLL, self.poll)
 
@@ -76,18 +79,44 @@ class VirtualGeneric(udi_interface.Node):
         else:
             LOGGER.debug(f"shortPoll {self.name}")
 
+    def setDBnames(self):
+        # the shelf is named after the node, see rename
+        self.dbname = str(self.name).replace(" ","_")
+        self.file = self.dbname + '.db'
+
+    def rename(self, newname):
+        """
+        Move this node's record to the shelf of the new name, the node
+        is created with the new name on the next restart.
+        """
+        record = None
+        if os.path.exists(self.file):
+            s = shelve.open(self.dbname, writeback=True)
+            try:
+                record = s.pop(self.key, None)
+                empty = not s
+            finally:
+                s.close()
+            if empty:
+                os.remove(self.file)
+        super().rename(newname)
+        self.setDBnames()
+        if record is not None:
+            s = shelve.open(self.dbname, writeback=True)
+            try:
+                s[self.key] = record
+            finally:
+                s.close()
+
     def createDBfile(self):
         try:
-            _name = str(self.name).replace(" ","_")
-            _key = 'key' + str(self.address)
-            _check = _name + '.db'
-            LOGGER.info(f'Checking to see existence of db file: {_check}')
-            if os.path.exists(_check):
+            LOGGER.info(f'Checking to see existence of db file: {self.file}')
+            if os.path.exists(self.file):
                 LOGGER.info('...file exists')
                 self.retrieveValues()
             else:
-                s = shelve.open(_name, writeback=True)
-                s[_key] = { 'switchStatus': self.level }
+                s = shelve.open(self.dbname, writeback=True)
+                s[self.key] = { 'switchStatus': self.level }
                 time.sleep(2)
                 s.close()
                 LOGGER.info("...file didn\'t exist, created successfully")
@@ -95,47 +124,33 @@ class VirtualGeneric(udi_interface.Node):
                 LOGGER.error(f"createDBfile error: {ex}")
 
     def deleteDB(self, command):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        _check = _name + '.db'
-        if os.path.exists(_check):
+        if os.path.exists(self.file):
             LOGGER.debug('Deleting db')
-            subprocess.run(["rm", _check])
-        time.sleep(1)
+            os.remove(self.file)
         self.firstPass = True
         self.start()
 
     def storeValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            s[_key] = { 'switchStatus': self.level}
+            s[self.key] = { 'switchStatus': self.level}
         finally:
             s.close()
         LOGGER.info('Storing Values')
         self.listValues()
 
     def listValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            existing = s[_key]
+            existing = s[self.key]
         finally:
             s.close()
         LOGGER.info(existing)
 
     def retrieveValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            existing = s[_key]
+            existing = s[self.key]
         finally:
             s.close()
         LOGGER.info('Retrieving Values %s', existing)
@@ -5,10 +5,9 @@ udi-Virtual-pg3 NodeServer/Plugin for EISY/Polisy
 
 VirtualSwitch class
 """
-import time
 import os.path
 import shelve
-import subprocess
+from threading import Lock
 
 import udi_interface
 
@@ -59,8 +58,15 @@ class VirtualSwitch(udi_interface.Node):
 
         self.switchStatus = 0
 
+        # the shelf is opened once and kept until stop or deleteDB
+        self.setDBnames()
+        self.key = 'key' + str(self.address)
+        self.db = None
+        self.dbLock = Lock()
+
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.POLL, self.poll)
+        self.poly.subscribe(self.poly.STOP, self.stop)
 
     def start(self):
         """
@@ -76,68 +82,87 @@ class VirtualSwitch(udi_interface.Node):
         else:
             LOGGER.debug(f"shortPoll {self.name}")
 
+    def stop(self):
+        self.closeDB()
+
+    def setDBnames(self):
+        # the shelf is named after the node, see rename
+        self.dbname = str(self.name).replace(" ","_")
+        self.file = self.dbname + '.db'
+
+    def openDB(self):
+        # caller holds dbLock
+        if self.db is None:
+            self.db = shelve.open(self.dbname, writeback=True)
+        return self.db
+
+    def closeDB(self):
+        with self.dbLock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def rename(self, newname):
+        """
+        Move this node's record to the shelf of the new name, the node
+        is created with the new name on the next restart.
+        """
+        with self.dbLock:
+            record = None
+            if os.path.exists(self.file):
+                db = self.openDB()
+                record = db.pop(self.key, None)
+                empty = not db
+                db.close()
+                self.db = None
+                if empty:
+                    os.remove(self.file)
+            super().rename(newname)
+            self.setDBnames()
+            if record is not None:
+                db = self.openDB()
+                db[self.key] = record
+                db.sync()
+
     def createDBfile(self):
         try:
-            _name = str(self.name).replace(" ","_")
-            _key = 'key' + str(self.address)
-            _check = _name + '.db'
-            LOGGER.info(f'Checking to see existence of db file: {_check}')
-            if os.path.exists(_check):
+            LOGGER.info(f'Checking to see existence of db file: {self.file}')
+            if os.path.exists(self.file):
                 LOGGER.info('...file exists')
                 self.retrieveValues()
             else:
-                s = shelve.open(_name, writeback=True)
-                s[_key] = { 'switchStatus': self.switchStatus }
-                time.sleep(2)
-                s.close()
+                with self.dbLock:
+                    db = self.openDB()
+                    db[self.key] = { 'switchStatus': self.switchStatus }
+                    db.sync()
                 LOGGER.info("...file didn\'t exist, created successfully")
         except Exception as ex:
                 LOGGER.error(f"createDBfile error: {ex}")
 
     def deleteDB(self, command):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        _check = _name + '.db'
-        if os.path.exists(_check):
+        self.closeDB()
+        if os.path.exists(self.file):
             LOGGER.debug('Deleting db')
-            subprocess.run(["rm", _check])
-        time.sleep(1)
+            os.remove(self.file)
         self.firstPass = True
         self.start()
 
     def storeValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            s[_key] = { 'switchStatus': self.switchStatus}
-        finally:
-            s.close()
+        with self.dbLock:
+            db = self.openDB()
+            db[self.key] = { 'switchStatus': self.switchStatus}
+            db.sync()
         LOGGER.info('Storing Values')
         self.listValues()
             
     def listValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            existing = s[_key]
-        finally:
-            s.close()
+        with self.dbLock:
+            existing = self.openDB()[self.key]
         LOGGER.info(existing)
 
     def retrieveValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            existing = s[_key]
-        finally:
-            s.close()
+        with self.dbLock:
+            existing = self.openDB()[self.key]
         LOGGER.info('Retrieving Values %s', existing)
         self.switchStatus = existing['switchStatus']
         self.setDriver('ST', self.switchStatus)
@@ -9,11 +9,10 @@ VirtualTemp class
 import os
 import time
 from datetime import datetime
-import re
 import shelve
 import os.path
-import subprocess
-from xml.dom.minidom import parseString
+from threading import Lock
+import xml.etree.ElementTree as ET
 
 # external imports
 import udi_interface
@@ -99,8 +98,16 @@ class VirtualTemp(udi_interface.Node):
         self.pullError = False
         self.lastUpdate = '0000'
 
+        # the shelf is opened once and kept until stop or deleteDB
+        self.setDBnames()
+        self.key = 'key' + str(self.address)
+        self.db = None
+        self.dbLock = Lock()
+        self.storedValues = None  # record last written to the shelf
+
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.POLL, self.poll)
+        self.poly.subscribe(self.poly.STOP, self.stop)
 
     def start(self):
         """
@@ -128,72 +135,92 @@ class VirtualTemp(udi_interface.Node):
     def setOff(self, command = None):
         pass
 
+    def stop(self):
+        self.closeDB()
+
+    def setDBnames(self):
+        # the shelf is named after the node, see rename
+        self.dbname = str(self.name).replace(" ","_")
+        self.file = self.dbname + '.db'
+
+    def openDB(self):
+        # caller holds dbLock
+        if self.db is None:
+            self.db = shelve.open(self.dbname, writeback=True)
+        return self.db
+
+    def closeDB(self):
+        with self.dbLock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+            self.storedValues = None
+
+    def rename(self, newname):
+        """
+        Move this node's record to the shelf of the new name, the node
+        is created with the new name on the next restart.
+        """
+        with self.dbLock:
+            record = None
+            if os.path.exists(self.file):
+                db = self.openDB()
+                record = db.pop(self.key, None)
+                empty = not db
+                db.close()
+                self.db = None
+                if empty:
+                    os.remove(self.file)
+            super().rename(newname)
+            self.setDBnames()
+            if record is not None:
+                db = self.openDB()
+                db[self.key] = record
+                db.sync()
+
     def createDBfile(self):
         try:
-            _name = str(self.name).replace(" ","_")
-            _key = 'key' + str(self.address)
-            _check = _name + '.db'
-            LOGGER.info(f'Checking to see existence of db file: {_check}')
-            if os.path.exists(_check):
+            LOGGER.info(f'Checking to see existence of db file: {self.file}')
+            if os.path.exists(self.file):
                 LOGGER.info('...file exists')
                 self.retrieveValues()
             else:
-                s = shelve.open(_name, writeback=True)
-                s[_key] = { 'created': 'yes'}
-                time.sleep(2)
-                s.close()
+                with self.dbLock:
+                    db = self.openDB()
+                    db[self.key] = { 'created': 'yes'}
+                    db.sync()
                 LOGGER.info("...file didn\'t exist, created successfully")
         except Exception as ex:
                 LOGGER.error(f"createDBfile error: {ex}")
 
     def deleteDB(self, command):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        _check = _name + '.db'
-        if os.path.exists(_check):
+        self.closeDB()
+        if os.path.exists(self.file):
             LOGGER.debug('Deleting db')
-            subprocess.run(["rm", _check])
-        time.sleep(1)
+            os.remove(self.file)
         self.firstPass = True
         self.start()
 
     def storeValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            s[_key] = { 'action1': self.action1, 'action1type': self.action1type, 'action1id': self.action1id,
-                        'action2': self.action2, 'action2type': self.action2type, 'action2id': self.action2id,
-                        'RtoPrec': self.RtoPrec, 'CtoF': self.CtoF, 'prevVal': self.prevVal, 'tempVal': self.tempVal,
-                        'highTemp': self.highTemp, 'lowTemp': self.lowTemp, 'previousHigh': self.previousHigh, 'previousLow': self.previousLow,
-                        'prevAvgTemp': self.prevAvgTemp, 'currentAvgTemp': self.currentAvgTemp, 'firstPass': self.firstPass }
-        finally:
-            s.close()
-        LOGGER.info('Storing Values')
-        self.listValues()
-
-    def listValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            existing = s[_key]
-        finally:
-            s.close()
-        LOGGER.info(existing)
+        values = { 'action1': self.action1, 'action1type': self.action1type, 'action1id': self.action1id,
+                   'action2': self.action2, 'action2type': self.action2type, 'action2id': self.action2id,
+                   'RtoPrec': self.RtoPrec, 'CtoF': self.CtoF, 'prevVal': self.prevVal, 'tempVal': self.tempVal,
+                   'highTemp': self.highTemp, 'lowTemp': self.lowTemp, 'previousHigh': self.previousHigh, 'previousLow': self.previousLow,
+                   'prevAvgTemp': self.prevAvgTemp, 'currentAvgTemp': self.currentAvgTemp, 'firstPass': self.firstPass }
+        with self.dbLock:
+            # only written when something changed since the last store
+            if values == self.storedValues:
+                return
+            db = self.openDB()
+            db[self.key] = values
+            db.sync()
+            self.storedValues = values
+        # log the record just written instead of reading it back
+        LOGGER.info('Storing Values %s', values)
 
     def retrieveValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
-        try:
-            existing = s[_key]
-        finally:
-            s.close()
+        with self.dbLock:
+            existing = self.openDB()[self.key]
         LOGGER.info('Retrieving Values %s', existing)
         self.prevVal = existing['prevVal']
         self.setDriver('GV1', self.prevVal)
@@ -325,9 +352,7 @@ class VirtualTemp(udi_interface.Node):
                 #LOGGER.info('Pulling from http://%s/rest/vars/get%s%s/', self.parent.isy, _type, _id)
                 r = self.isy.cmd('/rest/vars/get' + _type + _id)
                 LOGGER.debug(f'get value: {r}')
-                r = parseString(r)
-                # _content = str(r.content)p
-                _content = r.getElementsByTagName("var")[0].getElementsByTagName("val")[0].firstChild.toxml()
+                _content = next(ET.fromstring(r).iter('var')).findtext('.//val')
                 LOGGER.info('Content: %s', _content)
                 time.sleep(float(self.controller.parseDelay))
                 # _value = re.findall(r'(\d+|\-\d+)', _content)
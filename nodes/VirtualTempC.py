@@ -9,11 +9,9 @@ VirtualTempC class
 import os
 import time
 from datetime import datetime
-import re
 import shelve
 import os.path
-import subprocess
-from xml.dom.minidom import parseString
+import xml.etree.ElementTree as ET
 
 # external imports
 import udi_interface
@@ -99,6 +97,10 @@ class VirtualTempC(udi_interface.Node):
         self.pullError = False
         self.lastUpdate = '0000'
 
+        # db file names, computed once rather than on every store
+        self.setDBnames()
+        self.key = 'key' + str(self.address)
+
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.POLL, self.poll)
 
@@ -122,18 +124,44 @@ class VirtualTempC(udi_interface.Node):
             LOGGER.debug(f"shortPoll {self.name}")
             self.update()
 
+    def setDBnames(self):
+        # the shelf is named after the node, see rename
+        self.dbname = str(self.name).replace(" ","_")
+        self.file = self.dbname + '.db'
+
+    def rename(self, newname):
+        """
+        Move this node's record to the shelf of the new name, the node
+        is created with the new name on the next restart.
+        """
+        record = None
+        if os.path.exists(self.file):
+            s = shelve.open(self.dbname, writeback=True)
+            try:
+                record = s.pop(self.key, None)
+                empty = not s
+            finally:
+                s.close()
+            if empty:
+                os.remove(self.file)
+        super().rename(newname)
+        self.setDBnames()
+        if record is not None:
+            s = shelve.open(self.dbname, writeback=True)
+            try:
+                s[self.key] = record
+            finally:
+                s.close()
+
     def createDBfile(self):
         try:
-            _name = str(self.name).replace(" ","_")
-            _key = 'key' + str(self.address)
-            _check = _name + '.db'
-            LOGGER.info(f'Checking to see existence of db file: {_check}')
-            if os.path.exists(_check):
+            LOGGER.info(f'Checking to see existence of db file: {self.file}')
+            if os.path.exists(self.file):
                 LOGGER.info('...file exists')
                 self.retrieveValues()
             else:
-                s = shelve.open(_name, writeback=True)
-                s[_key] = { 'created': 'yes'}
+                s = shelve.open(self.dbname, writeback=True)
+                s[self.key] = { 'created': 'yes'}
                 time.sleep(2)
                 s.close()
                 LOGGER.info("...file didn\'t exist, created successfully")
@@ -141,24 +169,16 @@ class VirtualTempC(udi_interface.Node):
                 LOGGER.error(f"createDBfile error: {ex}")
 
     def deleteDB(self, command):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        _check = _name + '.db'
-        if os.path.exists(_check):
+        if os.path.exists(self.file):
             LOGGER.debug('Deleting db')
-            subprocess.run(["rm", _check])
-        time.sleep(1)
+            os.remove(self.file)
         self.firstPass = True
         self.start()
 
     def storeValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            s[_key] = { 'action1': self.action1, 'action1type': self.action1type, 'action1id': self.action1id,
+            s[self.key] = { 'action1': self.action1, 'action1type': self.action1type, 'action1id': self.action1id,
                         'action2': self.action2, 'action2type': self.action2type, 'action2id': self.action2id,
                         'RtoPrec': self.RtoPrec, 'FtoC': self.FtoC, 'prevVal': self.prevVal, 'tempVal': self.tempVal,
                         'highTemp': self.highTemp, 'lowTemp': self.lowTemp, 'previousHigh': self.previousHigh, 'previousLow': self.previousLow,
@@ -169,23 +189,17 @@ class VirtualTempC(udi_interface.Node):
         self.listValues()
 
     def listValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            existing = s[_key]
+            existing = s[self.key]
         finally:
             s.close()
         LOGGER.info(existing)
 
     def retrieveValues(self):
-        _name = str(self.name)
-        _name = _name.replace(" ","_")
-        _key = 'key' + str(self.address)
-        s = shelve.open(_name, writeback=True)
+        s = shelve.open(self.dbname, writeback=True)
         try:
-            existing = s[_key]
+            existing = s[self.key]
         finally:
             s.close()
         LOGGER.info('Retrieving Values %s ', existing)
@@ -319,9 +333,7 @@ class VirtualTempC(udi_interface.Node):
                 #LOGGER.info('Pulling from http://%s/rest/vars/get%s%s/', self.parent.isy, _type, _id)
                 r = self.isy.cmd('/rest/vars/get' + _type + _id)
                 LOGGER.debug(f'get value: {r}')
-                r = parseString(r)
-                # _content = str(r.content)
-                _content = r.getElementsByTagName("var")[0].getElementsByTagName("val")[0].firstChild.toxml()
+                _content = next(ET.fromstring(r).iter('var')).findtext('.//val')
                 LOGGER.info('Content: %s:', _content)
                 time.sleep(float(self.controller.parseDelay))
                 # _value = re.findall(r'(\d+|\-\d+)', _content)
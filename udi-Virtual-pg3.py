@@ -85,7 +85,8 @@ if __name__ == "__main__":
         Starts MQTT and connects to Polyglot.
         """
         polyglot.start(VERSION)
-        polyglot.updateProfile()
+        # profile upload is done by the Controller start, before the first
+        # discovery, only when changed or forced with forceProfile
 
         """
         Creates the Controller Node and passes in the Interface, the node's
@@ -97,6 +98,7 @@ if __name__ == "__main__":
           to automatically update node server status
         """
         control = Controller(polyglot, 'controller', 'controller', 'Virtual Device Controller')
+        control.register()
 
         """
         Sits around and does nothing forever, keeping your program running.